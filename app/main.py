@@ -2,9 +2,7 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
 
 from typing import List
-from PIL import Image
-import pytesseract
-import io
+import hashlib
 from aiolimiter import AsyncLimiter
 import logging
 
@@ -13,9 +11,11 @@ from validators.extention_validator import ExtensionValidator
 from validators.mime_validator import MimeValidator
 from validators.size_validator import SizeValidator
 from processors.pdf_processor import PDFProcessor
+from processors.image_processor import ImageProcessor
 from models.openai_models import OpenAIModel
 from known_tests import KNOWN_TESTS
 from utils import filter_known_tests
+from single_flight import SingleFlight
 
 # Initialize the FastAPI application
 app = FastAPI()
@@ -23,6 +23,9 @@ app = FastAPI()
 # Set a limit of 10 requests per minute
 limiter = AsyncLimiter(max_rate=10, time_period=60)
 
+# Coalesce identical uploads (ex. client retries) into a single in-progress extraction
+extractions = SingleFlight()
+
 @app.get("/")
 async def root():
     """
@@ -36,6 +39,27 @@ async def root():
 async def extract(file: UploadFile = File(...)):
     """
     Accepts a single PDF or image file, extracts lab test names and values.
+    Concurrent uploads of the same file share a single extraction.
+    """
+    content = await file.read()
+    await file.seek(0)
+    extension = file.filename.lower().rsplit(".", 1)[-1]
+    key = f"{extension}:{hashlib.sha256(content).hexdigest()}"
+
+    return await extractions.run(key, lambda: _extract(file))
+
+
+@app.get("/extract/stats")
+async def extract_stats():
+    """
+    Returns the counters of the /extract request coalescing.
+    """
+    return extractions.stats()
+
+
+async def _extract(file: UploadFile):
+    """
+    Extracts lab test names and values from a single PDF or image file.
     """
     try:
         filename = file.filename.lower()
@@ -43,9 +67,8 @@ async def extract(file: UploadFile = File(...)):
             pdf_processor = PDFProcessor(file)
             text = await pdf_processor.extract_text()
         elif filename.endswith((".jpg", ".jpeg", ".png", ".bmp", ".tiff")):
-            content = await file.read()
-            image = Image.open(io.BytesIO(content))
-            text = pytesseract.image_to_string(image)
+            image_processor = ImageProcessor(file)
+            text = await image_processor.extract_text()
         else:
             raise HTTPException(status_code=400, detail="Only PDF or image files are supported.")
 
@@ -0,0 +1,277 @@
+from processors.base_processor import BaseProcessor
+from fastapi import HTTPException, UploadFile
+from known_tests import KNOWN_TESTS
+from utils import find_known_tests
+from PIL import Image
+import numpy as np
+import pytesseract
+import asyncio
+import io
+
+# Grayscale value below which a pixel is considered ink
+INK_THRESHOLD = 160
+# Minimum number of ink pixels for a row (or a column of a line) to be considered as containing text
+MIN_INK_PIXELS = 2
+# Ink runs longer than this share of the page side (and at least RULE_MIN_LENGTH px) are rules, borders or shadows
+RULE_MIN_FRACTION = 0.04
+RULE_MIN_LENGTH = 40
+# Bands shorter than this (px) are leftover noise rather than text lines
+MIN_LINE_HEIGHT = 5
+# Minimum number of multi-column lines for a block to be considered a table
+MIN_TABLE_ROWS = 2
+# Lines further apart than this many line heights belong to different tables
+MAX_ROW_GAP = 3
+# Padding (px) added around each detected table region before cropping
+REGION_PADDING = 10
+# If the detected tables cover more than this share of the page, OCR the full page instead
+MAX_REGION_COVERAGE = 0.9
+# Tesseract config for table crops: single uniform block, keeping the spacing between columns
+TABLE_OCR_CONFIG = "--psm 6 -c preserve_interword_spaces=1"
+
+
+class ImageProcessor(BaseProcessor):
+    """
+    ImageProcessor is a subclass of BaseProcessor which takes a scanned report image as input, validates it, then
+    extracts the text of its results tables only. Table regions are found with a classical line and ruling detection
+    on the binarized page, cropped, and OCRed in parallel. The full page is OCRed when no table is detected, or when
+    the tables found do not contain any known test.
+
+    Attributes
+    ----------
+    file : UploadFile
+        image file to validate and extract text from
+    detect_tables : bool
+        whether to OCR only the detected table regions (True) or always the full page (False)
+
+    Methods
+    -------
+    _validate() -> Image
+        Validates the image file
+    _binarize(image: Image) -> ndarray
+        Computes the ink mask of the page without speckles, rules and borders
+    _find_long_runs(mask: ndarray, min_length: int) -> ndarray
+        Finds the pixels belonging to horizontal ink runs of at least min_length pixels
+    _detect_table_regions(image: Image) -> list of tuple
+        Finds the bounding boxes of the results tables in the image
+    _find_line_bands(ink: ndarray) -> list of tuple
+        Finds the horizontal bands of the page that contain text
+    _count_columns(band_ink: ndarray, min_gap: int) -> int
+        Counts the column segments of a band separated by at least min_gap blank pixels
+    _ocr_region(image: Image, box: tuple) -> str
+        OCRs a single table region
+    extract_text() -> str
+        extracts the text from the tables of the image, or the full image as a fallback
+    """
+
+    def __init__(self, file: UploadFile, detect_tables=True):
+        self.file = file
+        self.detect_tables = detect_tables
+        self.content = self.file.file.read()
+
+    def _validate(self):
+        """
+        Validates the image file before extracting text from it
+
+        Returns:
+            image (Image): the decoded image
+
+        Raises:
+            HTTPException: if the image is malformed
+        """
+        try:
+            image = Image.open(io.BytesIO(self.content))
+            image.load()
+            return image
+        except:
+            raise HTTPException(
+                status_code=400,
+                detail="File is malformed."
+            )
+
+    def _binarize(self, image):
+        """
+        Computes the ink mask of the page, keeping text only: long horizontal and vertical runs (table rules and
+        borders, box outlines, scanner edge shadows, margin lines) which would otherwise merge the lines and columns
+        of a table together are dropped, as well as isolated speckles.
+
+        Arguments:
+            image (Image): the page to binarize
+
+        Returns:
+            ink (ndarray): boolean mask of the page, True where there is text ink
+        """
+        ink = np.asarray(image.convert("L")) < INK_THRESHOLD
+        height, width = ink.shape
+
+        # Drop rules, in both directions
+        horizontal = self._find_long_runs(ink, max(int(width * RULE_MIN_FRACTION), RULE_MIN_LENGTH))
+        vertical = self._find_long_runs(ink.T, max(int(height * RULE_MIN_FRACTION), RULE_MIN_LENGTH)).T
+        ink &= ~(horizontal | vertical)
+
+        # Drop speckles, i.e. ink pixels without any ink neighbour
+        padded = np.pad(ink, 1).astype(np.uint8)
+        neighbours = sum(
+            padded[1 + dy:height + 1 + dy, 1 + dx:width + 1 + dx]
+            for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx
+        )
+        return ink & (neighbours > 0)
+
+    def _find_long_runs(self, mask, min_length):
+        """
+        Finds the pixels belonging to horizontal ink runs of at least min_length pixels.
+
+        Arguments:
+            mask (ndarray): boolean mask to search
+            min_length (int): minimum length of a run in pixels
+
+        Returns:
+            runs (ndarray): boolean mask, True on the pixels of the long runs
+        """
+        edges = np.diff(np.pad(mask, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+        long_runs = ends - starts >= min_length
+
+        # Mark the start and end of each long run, then fill in between
+        marks = np.zeros(edges.shape, dtype=np.int32)
+        np.add.at(marks, (rows[long_runs], starts[long_runs]), 1)
+        np.add.at(marks, (rows[long_runs], ends[long_runs]), -1)
+        return np.cumsum(marks, axis=1)[:, :-1] > 0
+
+    def _find_line_bands(self, ink):
+        """
+        Finds the horizontal bands of the page that contain text, i.e. text lines.
+
+        Arguments:
+            ink (ndarray): boolean mask of the page, True where there is text ink
+
+        Returns:
+            bands (list of tuple): (top, bottom) rows of each band, bottom exclusive
+        """
+        rows = np.concatenate(([False], ink.sum(axis=1) >= MIN_INK_PIXELS, [False]))
+        edges = np.flatnonzero(rows[1:] != rows[:-1])
+        return list(zip(edges[::2], edges[1::2]))
+
+    def _count_columns(self, band_ink, min_gap):
+        """
+        Counts the column segments of a band, merging segments separated by less than min_gap blank pixels
+        (i.e. the spaces between words of the same cell).
+
+        Arguments:
+            band_ink (ndarray): boolean mask of the band
+            min_gap (int): minimum blank width in pixels separating two columns
+
+        Returns:
+            columns (int): number of column segments in the band
+        """
+        cols = np.concatenate(([False], band_ink.sum(axis=0) >= MIN_INK_PIXELS, [False]))
+        edges = np.flatnonzero(cols[1:] != cols[:-1])
+        starts, ends = edges[::2], edges[1::2]
+        if len(starts) == 0:
+            return 0
+
+        gaps = starts[1:] - ends[:-1]
+        return int(np.count_nonzero(gaps >= min_gap)) + 1
+
+    def _detect_table_regions(self, image):
+        """
+        Finds the tables of the page. A table is a run of consecutive, close text lines split into at least two
+        columns.
+
+        Arguments:
+            image (Image): the page to analyse
+
+        Returns:
+            regions (list of tuple): (left, top, right, bottom) boxes of the tables, top to bottom. Empty if no
+            table was found, or if the tables cover nearly the whole page.
+        """
+        ink = self._binarize(image)
+        height, width = ink.shape
+
+        groups = []
+        current = []
+        for top, bottom in self._find_line_bands(ink):
+            line_height = bottom - top
+            if line_height < MIN_LINE_HEIGHT:
+                continue
+
+            # A large vertical gap ends the table
+            if current and top - current[-1][1] > MAX_ROW_GAP * line_height:
+                if len(current) >= MIN_TABLE_ROWS:
+                    groups.append(current)
+                current = []
+
+            # Columns are separated by much more than the space between two words
+            min_gap = max(int(line_height * 1.5), int(width * 0.02))
+            if self._count_columns(ink[top:bottom], min_gap) >= 2:
+                current.append((top, bottom))
+            else:
+                if len(current) >= MIN_TABLE_ROWS:
+                    groups.append(current)
+                current = []
+
+        if len(current) >= MIN_TABLE_ROWS:
+            groups.append(current)
+
+        regions = []
+        for group in groups:
+            top, bottom = group[0][0], group[-1][1]
+            columns = np.flatnonzero(ink[top:bottom].any(axis=0))
+            regions.append((
+                max(int(columns[0]) - REGION_PADDING, 0),
+                max(int(top) - REGION_PADDING, 0),
+                min(int(columns[-1]) + 1 + REGION_PADDING, width),
+                min(int(bottom) + REGION_PADDING, height),
+            ))
+
+        # Cropping brings nothing when the tables are the whole page
+        covered = sum((right - left) * (bottom - top) for left, top, right, bottom in regions)
+        if covered > MAX_REGION_COVERAGE * width * height:
+            return []
+
+        return regions
+
+    def _ocr_region(self, image, box):
+        """
+        OCRs a single table region with a table friendly page segmentation mode.
+
+        Arguments:
+            image (Image): the full page
+            box (tuple): (left, top, right, bottom) of the region
+
+        Returns:
+            text (str): text of the region
+        """
+        return pytesseract.image_to_string(image.crop(box), config=TABLE_OCR_CONFIG)
+
+    async def extract_text(self):
+        """
+        Extracts the text of the results tables of the image. Table regions are OCRed in parallel, and the full
+        page is OCRed if no table was detected or no known test was found in them (ex. only the patient details
+        block was detected).
+
+        Returns:
+            extracted_text (str): extracted text from the image
+
+        Raises:
+            HttpException: if could not extract text from image file
+        """
+        # Decoding and analysing a full resolution scan is CPU bound, keep it off the event loop
+        image = await asyncio.to_thread(self._validate)
+        try:
+            regions = await asyncio.to_thread(self._detect_table_regions, image) if self.detect_tables else []
+            if regions:
+                texts = await asyncio.gather(
+                    *(asyncio.to_thread(self._ocr_region, image, box) for box in regions)
+                )
+                extracted_text = "\n\n".join(text.strip() for text in texts if text.strip())
+                if find_known_tests(extracted_text, KNOWN_TESTS):
+                    return extracted_text
+
+            # Fallback to full page OCR
+            return await asyncio.to_thread(pytesseract.image_to_string, image)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"{str(e)}"
+            )
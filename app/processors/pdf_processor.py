@@ -52,9 +52,9 @@ class PDFProcessor(BaseProcessor):
             HTTPException: if the temporary file cannot be created
         """
         try:
-            tmp_dir = tempfile.gettempdir()
-            tmp_filepath = os.path.join(tmp_dir, self.file.filename)
-            with open(tmp_filepath, "wb") as temp_file:
+            # Unique path so concurrent uploads with the same filename do not overwrite each other
+            tmp_fd, tmp_filepath = tempfile.mkstemp(suffix=".pdf")
+            with os.fdopen(tmp_fd, "wb") as temp_file:
                 shutil.copyfileobj(self.file.file, temp_file)
 
             return tmp_filepath
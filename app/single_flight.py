@@ -0,0 +1,66 @@
+import asyncio
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls sharing the same key: the first call runs the work, and every call made with the
+    same key while it is in progress attaches to it and receives the same result (or exception).
+
+    Attributes
+    ----------
+    calls : int
+        Number of calls received
+    coalesced : int
+        Number of calls that attached to an in-progress call instead of running their own
+
+    Methods
+    -------
+    run(key: str, func: callable) -> any
+        Awaits func() once per in-progress key and returns its result
+    stats() -> dict
+        Returns the counters
+    """
+
+    def __init__(self):
+        self.in_flight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key, func):
+        """
+        Awaits func() unless a call with the same key is already in progress, in which case its result is awaited
+        instead.
+
+        Arguments:
+            key (str): identifies identical calls, ex. the hash of an uploaded file
+            func (callable): coroutine function doing the work
+
+        Returns:
+            result: the result of the in-progress call for this key
+
+        Raises:
+            Exception: any exception raised by func
+        """
+        self.calls += 1
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(func())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # Shield the shared task so a caller disconnecting does not cancel it for the others
+        return await asyncio.shield(task)
+
+    def stats(self):
+        """
+        Returns the counters.
+
+        Returns:
+            stats (dict): calls received, calls coalesced and calls currently in progress
+        """
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight),
+        }
@@ -1,4 +1,6 @@
 # app/utils.py
+import re
+
 def filter_known_tests(lab_results, known_tests):
     """
     Filters the extracted lab results to include only known tests.
@@ -7,3 +9,13 @@ def filter_known_tests(lab_results, known_tests):
         result for result in lab_results
         if result.get("test_name") in known_tests
     ]
+
+def find_known_tests(text, known_tests):
+    """
+    Finds the known tests whose name appears in the text as a whole word, case insensitive.
+    """
+    text = text.upper()
+    return [
+        test for test in known_tests
+        if re.search(rf"(?<!\w){re.escape(test.upper())}(?!\w)", text)
+    ]
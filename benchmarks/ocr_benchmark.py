@@ -0,0 +1,58 @@
+"""
+Benchmarks the table region OCR of ImageProcessor against full page OCR on a set of scanned reports.
+
+For every page, reports the OCR time of both modes and the extraction recall of the table region OCR, i.e. the share
+of the known test names found by full page OCR that are also found in the table regions.
+
+Usage:
+    python benchmarks/ocr_benchmark.py report1.png report2.jpg ...
+"""
+from fastapi import UploadFile
+import asyncio
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from processors.image_processor import ImageProcessor
+from known_tests import KNOWN_TESTS
+from utils import find_known_tests
+
+
+async def run_ocr(path, detect_tables):
+    """
+    OCRs the image at path and returns the extracted text with the time it took in seconds.
+    """
+    with open(path, "rb") as f:
+        processor = ImageProcessor(UploadFile(filename=os.path.basename(path), file=f), detect_tables=detect_tables)
+
+    start = time.perf_counter()
+    text = await processor.extract_text()
+    return text, time.perf_counter() - start
+
+async def main(paths):
+    total_full, total_roi, total_found, total_expected = 0.0, 0.0, 0, 0
+    print(f"{'page':<40}{'full (s)':>10}{'tables (s)':>12}{'recall':>8}")
+    for path in paths:
+        full_text, full_time = await run_ocr(path, detect_tables=False)
+        roi_text, roi_time = await run_ocr(path, detect_tables=True)
+
+        expected = set(find_known_tests(full_text, KNOWN_TESTS))
+        found = set(find_known_tests(roi_text, KNOWN_TESTS)) & expected
+        recall = len(found) / len(expected) if expected else 1.0
+        print(f"{os.path.basename(path):<40}{full_time:>10.2f}{roi_time:>12.2f}{recall:>8.2%}")
+
+        total_full += full_time
+        total_roi += roi_time
+        total_found += len(found)
+        total_expected += len(expected)
+
+    recall = total_found / total_expected if total_expected else 1.0
+    print(f"{'mean per page':<40}{total_full / len(paths):>10.2f}{total_roi / len(paths):>12.2f}{recall:>8.2%}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,117 @@
+import pytest
+import random
+from fastapi import UploadFile
+from io import BytesIO
+from PIL import Image, ImageDraw
+from app.processors.image_processor import ImageProcessor, TABLE_OCR_CONFIG
+
+def draw_word(draw, left, top, width):
+    # Draw a mock word as a sequence of glyphs
+    for x in range(left, left + width - 10, 14):
+        draw.rectangle((x, top, x + 9, top + 20), fill=0)
+
+def make_page(table_rows=0, bordered=False):
+    # Draw a mock report: a header line, a narrative paragraph, then a table of 3 columns
+    page = Image.new("L", (1000, 1400), color=255)
+    draw = ImageDraw.Draw(page)
+    draw_word(draw, 50, 40, 350)
+    for i in range(4):
+        for left in range(50, 900, 120):
+            draw_word(draw, left, 120 + i * 40, 110)
+
+    for i in range(table_rows):
+        top = 420 + i * 40
+        draw_word(draw, 60, top, 250)
+        draw_word(draw, 450, top, 100)
+        draw_word(draw, 750, top, 150)
+
+    if bordered and table_rows:
+        # Box outline, column rules and row rules
+        bottom = 410 + table_rows * 40
+        draw.rectangle((40, 400, 960, bottom), outline=0, width=2)
+        for x in (400, 700):
+            draw.line((x, 400, x, bottom), fill=0, width=2)
+        for i in range(1, table_rows):
+            draw.line((40, 410 + i * 40, 960, 410 + i * 40), fill=0, width=1)
+        # Scanner edge shadow along the whole page
+        draw.rectangle((0, 0, 5, 1399), fill=0)
+    return page
+
+def make_processor(page):
+    content = BytesIO()
+    page.save(content, format="PNG")
+    content.seek(0)
+    return ImageProcessor(UploadFile(filename="test.png", file=content))
+
+def mock_ocr(monkeypatch, crop_text):
+    calls = []
+    def image_to_string(image, config=""):
+        calls.append(config)
+        return crop_text if config == TABLE_OCR_CONFIG else "full page text"
+    monkeypatch.setattr("app.processors.image_processor.pytesseract.image_to_string", image_to_string)
+    return calls
+
+def test_detects_table_region():
+    page = make_page(table_rows=5)
+    regions = make_processor(page)._detect_table_regions(page)
+
+    # Only the table is kept
+    assert len(regions) == 1
+    left, top, right, bottom = regions[0]
+    assert 280 < top <= 420 and bottom >= 420 + 4 * 40 + 20
+
+def test_detects_bordered_table_region():
+    page = make_page(table_rows=5, bordered=True)
+
+    # Sprinkle speckle noise over the page
+    draw = ImageDraw.Draw(page)
+    rng = random.Random(0)
+    for _ in range(2000):
+        draw.point((rng.randrange(1000), rng.randrange(1400)), fill=0)
+
+    regions = make_processor(page)._detect_table_regions(page)
+    assert len(regions) == 1
+    left, top, right, bottom = regions[0]
+    assert 280 < top <= 420 and bottom >= 420 + 4 * 40 + 20
+
+def test_no_table_region():
+    page = make_page()
+    assert make_processor(page)._detect_table_regions(page) == []
+
+@pytest.mark.asyncio
+async def test_ocr_table_regions(monkeypatch):
+    page = make_page(table_rows=5)
+    # Add a second table further down the page
+    draw = ImageDraw.Draw(page)
+    for i in range(3):
+        draw_word(draw, 60, 900 + i * 40, 250)
+        draw_word(draw, 750, 900 + i * 40, 150)
+    calls = mock_ocr(monkeypatch, " HDL CHOLESTEROL   50 \n")
+
+    text = await make_processor(page).extract_text()
+
+    # Each table is OCRed with the table config, then joined
+    assert calls == [TABLE_OCR_CONFIG, TABLE_OCR_CONFIG]
+    assert text == "HDL CHOLESTEROL   50\n\nHDL CHOLESTEROL   50"
+
+@pytest.mark.asyncio
+async def test_fallback_on_blank_regions(monkeypatch):
+    calls = mock_ocr(monkeypatch, "  \n")
+
+    assert await make_processor(make_page(table_rows=5)).extract_text() == "full page text"
+    assert calls == [TABLE_OCR_CONFIG, ""]
+
+@pytest.mark.asyncio
+async def test_fallback_on_regions_without_known_tests(monkeypatch):
+    # ex. only the patient details block was detected
+    calls = mock_ocr(monkeypatch, "Name: John Doe   Age: 45\nCollected: 01/02   Received: 01/02")
+
+    assert await make_processor(make_page(table_rows=5)).extract_text() == "full page text"
+    assert calls == [TABLE_OCR_CONFIG, ""]
+
+@pytest.mark.asyncio
+async def test_fallback_to_full_page(monkeypatch):
+    calls = mock_ocr(monkeypatch, "")
+
+    assert await make_processor(make_page()).extract_text() == "full page text"
+    assert calls == [""]
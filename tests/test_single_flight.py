@@ -0,0 +1,83 @@
+import pytest
+import asyncio
+import httpx
+from app.single_flight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_coalesces_concurrent_calls():
+    single_flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"lab_results": []}
+
+    results = await asyncio.gather(*(single_flight.run("same", work) for _ in range(20)))
+
+    # Only one call did the work, all received its result
+    assert len(runs) == 1
+    assert all(result is results[0] for result in results)
+    assert single_flight.stats() == {"calls": 20, "coalesced": 19, "in_flight": 0}
+
+@pytest.mark.asyncio
+async def test_does_not_coalesce_different_or_sequential_calls():
+    single_flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    await asyncio.gather(single_flight.run("a", work), single_flight.run("b", work))
+    await single_flight.run("a", work)
+    assert single_flight.stats() == {"calls": 3, "coalesced": 0, "in_flight": 0}
+
+@pytest.mark.asyncio
+async def test_shares_exception():
+    single_flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Failed")
+
+    results = await asyncio.gather(*(single_flight.run("same", work) for _ in range(5)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert single_flight.stats()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_extract_duplicate_uploads(monkeypatch):
+    from app import main
+    monkeypatch.setattr(main, "extractions", SingleFlight())
+    runs = []
+
+    class MockProcessor:
+        def __init__(self, file):
+            self.content = file.file.read()
+
+        async def extract_text(self):
+            runs.append(self.content)
+            await asyncio.sleep(0.1)
+            return "HDL CHOLESTEROL 50"
+
+    class MockModel:
+        def __init__(self, model):
+            pass
+
+        def get_fields(self, text):
+            return {"lab_results": [{"test_name": "HDL CHOLESTEROL", "value": "50"}]}
+
+    monkeypatch.setattr(main, "PDFProcessor", MockProcessor)
+    monkeypatch.setattr(main, "OpenAIModel", MockModel)
+
+    # Fire the same upload concurrently, as retrying clients do, plus a different one
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        uploads = [{"file": ("lab-result.pdf", b"same pdf", "application/pdf")} for _ in range(10)]
+        uploads.append({"file": ("lab-result.pdf", b"other pdf", "application/pdf")})
+        responses = await asyncio.gather(*(client.post("/extract", files=upload) for upload in uploads))
+        stats = (await client.get("/extract/stats")).json()
+
+    assert all(response.status_code == 200 for response in responses)
+    assert all(response.json() == responses[0].json() for response in responses)
+    assert sorted(runs) == [b"other pdf", b"same pdf"]
+    assert stats == {"calls": 11, "coalesced": 9, "in_flight": 0}